@@ -2,8 +2,8 @@
 
 from typing import Dict, List, Optional, Union, cast
 
-from .errors import DuplicateIdError, ReferenceError, ValidationError
-from .nodes import Node, TextNode, FileNode, LinkNode, GroupNode
+from .errors import DuplicateIdError, ReferenceError
+from .nodes import Node
 from .edges import Edge
 
 
@@ -27,22 +27,26 @@ class Canvas:
         self._validate_edge_references()
 
     def _validate_ids(self) -> None:
-        """Validate that all node and edge IDs are unique.
+        """Validate that all node and edge IDs are unique and index them by ID.
+
+        The indexes back the ID lookups below and are kept in sync by the
+        add and remove methods.
 
         Raises:
             DuplicateIdError: If any duplicate IDs are found
         """
-        ids = set()
+        self._node_index: Dict[str, Node] = {}
+        self._edge_index: Dict[str, Edge] = {}
         # Check node IDs
         for node in self.nodes:
-            if node.id in ids:
+            if node.id in self._node_index:
                 raise DuplicateIdError(f"Duplicate node ID found: {node.id}")
-            ids.add(node.id)
+            self._node_index[node.id] = node
         # Check edge IDs
         for edge in self.edges:
-            if edge.id in ids:
+            if edge.id in self._edge_index or edge.id in self._node_index:
                 raise DuplicateIdError(f"Duplicate edge ID found: {edge.id}")
-            ids.add(edge.id)
+            self._edge_index[edge.id] = edge
 
     def _validate_edge_references(self) -> None:
         """Validate that all edge references point to existing nodes.
@@ -50,7 +54,7 @@ class Canvas:
         Raises:
             ReferenceError: If an edge references a non-existent node
         """
-        node_ids = {node.id for node in self.nodes}
+        node_ids = self._node_index
         for edge in self.edges:
             if edge.from_node not in node_ids:
                 raise ReferenceError(
@@ -71,9 +75,10 @@ class Canvas:
             DuplicateIdError: If a node with the same ID already exists
         """
         # Check for duplicate ID
-        if any(n.id == node.id for n in self.nodes):
+        if node.id in self._node_index:
             raise DuplicateIdError(f"Node with ID {node.id} already exists")
         self.nodes.append(node)
+        self._node_index[node.id] = node
 
     def add_edge(self, edge: Edge) -> None:
         """Add an edge to the canvas.
@@ -86,11 +91,11 @@ class Canvas:
             ReferenceError: If the edge references non-existent nodes
         """
         # Check for duplicate ID
-        if any(e.id == edge.id for e in self.edges):
+        if edge.id in self._edge_index:
             raise DuplicateIdError(f"Edge with ID {edge.id} already exists")
         
         # Validate node references
-        node_ids = {node.id for node in self.nodes}
+        node_ids = self._node_index
         if edge.from_node not in node_ids:
             raise ReferenceError(
                 f"Edge references non-existent from_node: {edge.from_node}"
@@ -101,6 +106,7 @@ class Canvas:
             )
             
         self.edges.append(edge)
+        self._edge_index[edge.id] = edge
 
     def get_node(self, node_id: str) -> Optional[Node]:
         """Get a node by its ID.
@@ -111,10 +117,7 @@ class Canvas:
         Returns:
             The node if found, None otherwise
         """
-        for node in self.nodes:
-            if node.id == node_id:
-                return node
-        return None
+        return self._node_index.get(node_id)
 
     def get_edge(self, edge_id: str) -> Optional[Edge]:
         """Get an edge by its ID.
@@ -125,10 +128,7 @@ class Canvas:
         Returns:
             The edge if found, None otherwise
         """
-        for edge in self.edges:
-            if edge.id == edge_id:
-                return edge
-        return None
+        return self._edge_index.get(edge_id)
 
     def remove_node(self, node_id: str) -> Optional[Node]:
         """Remove a node and all its connected edges.
@@ -140,22 +140,18 @@ class Canvas:
             The removed node if found, None otherwise
         """
         # Find and remove the node
-        node_index = None
-        for i, node in enumerate(self.nodes):
-            if node.id == node_id:
-                node_index = i
-                break
-        
-        if node_index is None:
+        removed_node = self._node_index.pop(node_id, None)
+        if removed_node is None:
             return None
             
-        removed_node = self.nodes.pop(node_index)
+        self.nodes.remove(removed_node)
         
         # Remove all edges connected to this node
         self.edges = [
             edge for edge in self.edges
             if edge.from_node != node_id and edge.to_node != node_id
         ]
+        self._edge_index = {edge.id: edge for edge in self.edges}
         
         return removed_node
 
@@ -168,16 +164,12 @@ class Canvas:
         Returns:
             The removed edge if found, None otherwise
         """
-        edge_index = None
-        for i, edge in enumerate(self.edges):
-            if edge.id == edge_id:
-                edge_index = i
-                break
-                
-        if edge_index is None:
+        removed_edge = self._edge_index.pop(edge_id, None)
+        if removed_edge is None:
             return None
             
-        return self.edges.pop(edge_index)
+        self.edges.remove(removed_edge)
+        return removed_edge
 
     def to_dict(self) -> Dict:
         """Convert the canvas to a dictionary.
@@ -212,52 +204,7 @@ class Canvas:
 
         # Parse nodes
         for node_data in data.get("nodes", []):
-            node_type = node_data.get("type")
-            if node_type == "text":
-                nodes.append(TextNode(
-                    id=node_data["id"],
-                    x=node_data["x"],
-                    y=node_data["y"],
-                    width=node_data["width"],
-                    height=node_data["height"],
-                    text=node_data["text"],
-                    color=node_data.get("color")
-                ))
-            elif node_type == "file":
-                nodes.append(FileNode(
-                    id=node_data["id"],
-                    x=node_data["x"],
-                    y=node_data["y"],
-                    width=node_data["width"],
-                    height=node_data["height"],
-                    file=node_data["file"],
-                    subpath=node_data.get("subpath"),
-                    color=node_data.get("color")
-                ))
-            elif node_type == "link":
-                nodes.append(LinkNode(
-                    id=node_data["id"],
-                    x=node_data["x"],
-                    y=node_data["y"],
-                    width=node_data["width"],
-                    height=node_data["height"],
-                    url=node_data["url"],
-                    color=node_data.get("color")
-                ))
-            elif node_type == "group":
-                nodes.append(GroupNode(
-                    id=node_data["id"],
-                    x=node_data["x"],
-                    y=node_data["y"],
-                    width=node_data["width"],
-                    height=node_data["height"],
-                    label=node_data.get("label"),
-                    background=node_data.get("background"),
-                    background_style=node_data.get("backgroundStyle"),
-                    color=node_data.get("color")
-                ))
-            else:
-                raise ValidationError(f"Invalid node type: {node_type}")
+            nodes.append(Node.from_dict(node_data))
 
         # Parse edges
         for edge_data in data.get("edges", []):
@@ -3,6 +3,20 @@
 from typing import Dict, Literal, Optional
 
 from .errors import InvalidEdgeError
+from .nodes import PRESET_COLORS
+
+# Allowed values, built once instead of on every edge construction
+VALID_SIDES = frozenset({"top", "right", "bottom", "left"})
+VALID_ENDS = frozenset({"none", "arrow"})
+
+
+def _is_allowed(value: object, allowed: frozenset) -> bool:
+    """Check that an optional value is None or one of the allowed strings.
+
+    The type is checked first, so an unhashable value fails validation
+    instead of raising TypeError in the set lookup.
+    """
+    return value is None or (isinstance(value, str) and value in allowed)
 
 
 class Edge:
@@ -38,12 +52,11 @@ class Edge:
         self.to_node = to_node
         
         # Validate sides
-        valid_sides = ["top", "right", "bottom", "left", None]
-        if from_side not in valid_sides:
+        if not _is_allowed(from_side, VALID_SIDES):
             raise InvalidEdgeError(
                 "from_side must be one of: top, right, bottom, left"
             )
-        if to_side not in valid_sides:
+        if not _is_allowed(to_side, VALID_SIDES):
             raise InvalidEdgeError(
                 "to_side must be one of: top, right, bottom, left"
             )
@@ -51,12 +64,11 @@ class Edge:
         self.to_side = to_side
 
         # Validate endpoints
-        valid_ends = ["none", "arrow", None]
-        if from_end not in valid_ends:
+        if not _is_allowed(from_end, VALID_ENDS):
             raise InvalidEdgeError(
                 "from_end must be one of: none, arrow"
             )
-        if to_end not in valid_ends:
+        if not _is_allowed(to_end, VALID_ENDS):
             raise InvalidEdgeError(
                 "to_end must be one of: none, arrow"
             )
@@ -80,9 +92,9 @@ class Edge:
             InvalidEdgeError: If the color is invalid
         """
         if color is not None:
-            if not (
+            if not isinstance(color, str) or not (
                 (color.startswith("#") and len(color) == 7) or
-                color in ["1", "2", "3", "4", "5", "6"]
+                color in PRESET_COLORS
             ):
                 raise InvalidEdgeError(
                     "Color must be a hex code (#RRGGBB) or preset number (1-6)"
@@ -3,7 +3,11 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Optional, Union, Literal
 
-from .errors import InvalidNodeError
+from .errors import InvalidNodeError, ValidationError
+
+# Allowed values, built once instead of on every node construction
+PRESET_COLORS = frozenset({"1", "2", "3", "4", "5", "6"})
+BACKGROUND_STYLES = frozenset({"cover", "ratio", "repeat"})
 
 
 class Node(ABC):
@@ -60,6 +64,66 @@ class Node(ABC):
             node_dict["color"] = self.color
         return node_dict
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Node":
+        """Create a node of the matching type from a dictionary.
+
+        Args:
+            data: Dictionary representation of a node
+
+        Returns:
+            A new node instance of the class named by the "type" key
+
+        Raises:
+            ValidationError: If the node type is invalid
+        """
+        node_type = data.get("type")
+        if node_type == "text":
+            return TextNode(
+                id=data["id"],
+                x=data["x"],
+                y=data["y"],
+                width=data["width"],
+                height=data["height"],
+                text=data["text"],
+                color=data.get("color")
+            )
+        elif node_type == "file":
+            return FileNode(
+                id=data["id"],
+                x=data["x"],
+                y=data["y"],
+                width=data["width"],
+                height=data["height"],
+                file=data["file"],
+                subpath=data.get("subpath"),
+                color=data.get("color")
+            )
+        elif node_type == "link":
+            return LinkNode(
+                id=data["id"],
+                x=data["x"],
+                y=data["y"],
+                width=data["width"],
+                height=data["height"],
+                url=data["url"],
+                color=data.get("color")
+            )
+        elif node_type == "group":
+            return GroupNode(
+                id=data["id"],
+                x=data["x"],
+                y=data["y"],
+                width=data["width"],
+                height=data["height"],
+                label=data.get("label"),
+                background=data.get("background"),
+                background_style=data.get("backgroundStyle"),
+                color=data.get("color")
+            )
+        else:
+            raise ValidationError(f"Invalid node type: {node_type}")
+
     @classmethod
     def validate_color(cls, color: Optional[str]) -> None:
         """Validate a color value.
@@ -71,9 +135,9 @@ class Node(ABC):
             InvalidNodeError: If the color is invalid
         """
         if color is not None:
-            if not (
+            if not isinstance(color, str) or not (
                 (color.startswith("#") and len(color) == 7) or
-                color in ["1", "2", "3", "4", "5", "6"]
+                color in PRESET_COLORS
             ):
                 raise InvalidNodeError(
                     "Color must be a hex code (#RRGGBB) or preset number (1-6)"
@@ -235,7 +299,9 @@ class GroupNode(Node):
         super().__init__(id, x, y, width, height, color)
         self.label = label
         self.background = background
-        if background_style not in [None, "cover", "ratio", "repeat"]:
+        if background_style is not None and not (
+            isinstance(background_style, str) and background_style in BACKGROUND_STYLES
+        ):
             raise InvalidNodeError(
                 "Background style must be one of: cover, ratio, repeat"
             )
@@ -0,0 +1,36 @@
+"""Shared pytest setup."""
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+# mcp_server creates OUTPUT_PATH when imported; keep it out of the working tree.
+# Tests point the server at their own tmp_path.
+os.environ.setdefault("OUTPUT_PATH", tempfile.mkdtemp(prefix="jsoncanvas-tests-"))
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """Point the server at an empty output directory with cold caches."""
+    import mcp_server
+
+    monkeypatch.setattr(mcp_server, "OUTPUT_PATH", tmp_path)
+    monkeypatch.setattr(mcp_server, "_FILE_INDEX", {})
+    mcp_server._CANVAS_CACHE.clear()
+    mcp_server._CHECKED_OUT_PAYLOADS.clear()
+    mcp_server._clear_read_caches()
+    return tmp_path
+
+
+@pytest.fixture
+def call_tool():
+    """Call a tool through the server's dispatcher and return its text."""
+    import mcp_server
+
+    def call(name, arguments):
+        result = asyncio.run(mcp_server.handle_call_tool(name, arguments))
+        return result[0].text
+
+    return call
@@ -0,0 +1,102 @@
+"""Tests for the batch_apply tool."""
+
+import json
+
+import pytest
+
+
+def text_node(node_id):
+    return {
+        "id": node_id,
+        "type": "text",
+        "text": node_id,
+        "x": 0,
+        "y": 0,
+        "width": 100,
+        "height": 50,
+    }
+
+
+@pytest.fixture
+def canvas_file(output_dir):
+    """A canvas with a single node "a" in a fresh output directory."""
+    path = output_dir / "batch.canvas"
+    path.write_text(json.dumps({"nodes": [text_node("a")]}), encoding="utf-8")
+    return path
+
+
+def read_canvas(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_mixed_batch_is_saved(canvas_file, call_tool):
+    text = call_tool("batch_apply", {
+        "filename": canvas_file.name,
+        "ops": [
+            {"op": "add_node", "node": text_node("b")},
+            {"op": "add_edge", "from_node": "a", "to_node": "b", "label": "next"},
+            {"op": "add_node", "node": text_node("c")},
+            {"op": "add_edge", "id": "b-c", "from_node": "b", "to_node": "c"},
+        ],
+    })
+
+    assert text.startswith("Applied 4 operation(s)")
+    assert "added 2 node(s) and 2 edge(s)" in text
+    data = read_canvas(canvas_file)
+    assert [n["id"] for n in data["nodes"]] == ["a", "b", "c"]
+    edges = data["edges"]
+    assert [(e["fromNode"], e["toNode"]) for e in edges] == [("a", "b"), ("b", "c")]
+    assert edges[0]["label"] == "next"
+    assert edges[1]["id"] == "b-c"
+
+
+def test_failing_op_saves_nothing(canvas_file, call_tool):
+    # Warm the edit cache so the failing batch works on a cached Canvas
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("b")})
+    before = canvas_file.read_bytes()
+
+    text = call_tool("batch_apply", {
+        "filename": canvas_file.name,
+        "ops": [
+            {"op": "add_node", "node": text_node("partial")},
+            {"op": "add_edge", "from_node": "a", "to_node": "missing"},
+        ],
+    })
+
+    assert text.startswith("Error in operation 1 (add_edge)")
+    assert text.endswith("Nothing was saved.")
+    assert canvas_file.read_bytes() == before
+    node_text = call_tool(
+        "get_node", {"filename": canvas_file.name, "node_id": "partial"}
+    )
+    assert "not found" in node_text
+
+    # The next edit must not pick up the node from the failed batch
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("c")})
+    assert [n["id"] for n in read_canvas(canvas_file)["nodes"]] == ["a", "b", "c"]
+
+
+def test_generated_edge_ids_are_unique(canvas_file, call_tool):
+    text = call_tool("batch_apply", {
+        "filename": canvas_file.name,
+        "ops": [
+            {"op": "add_node", "node": text_node("b")},
+            {"op": "add_edge", "from_node": "a", "to_node": "b"},
+            {"op": "add_edge", "from_node": "b", "to_node": "a"},
+            {"op": "add_edge", "from_node": "a", "to_node": "b"},
+        ],
+    })
+
+    assert text.startswith("Applied 4 operation(s)")
+    edge_ids = [e["id"] for e in read_canvas(canvas_file)["edges"]]
+    assert len(edge_ids) == 3
+    assert len(set(edge_ids)) == 3
+
+
+def test_empty_batch_leaves_file_untouched(canvas_file, call_tool):
+    before = canvas_file.stat().st_mtime_ns
+
+    text = call_tool("batch_apply", {"filename": canvas_file.name, "ops": []})
+
+    assert text == "Error: No operations provided"
+    assert canvas_file.stat().st_mtime_ns == before
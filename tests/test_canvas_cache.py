@@ -0,0 +1,127 @@
+"""Tests for reusing saved Canvas objects across edits."""
+
+import json
+import os
+
+import pytest
+
+import mcp_server
+
+
+def text_node(node_id, x=0):
+    return {"id": node_id, "type": "text", "text": node_id,
+            "x": x, "y": 0, "width": 1, "height": 1}
+
+
+def link_node(node_id):
+    return {"id": node_id, "type": "link", "url": "https://example.com",
+            "x": 0, "y": 0, "width": 1, "height": 1}
+
+
+@pytest.fixture
+def canvas_file(output_dir, call_tool):
+    """A saved canvas whose Canvas object is in the edit cache."""
+    path = output_dir / "cache.canvas"
+    path.write_text(json.dumps({"nodes": [text_node("a")]}), encoding="utf-8")
+    call_tool("add_node", {"filename": path.name, "node": link_node("l")})
+    return path
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Count the canvas files loaded from disk into a Canvas."""
+    calls = []
+    load = mcp_server.load_canvas_from_file
+
+    def counting_load(file_path):
+        calls.append(file_path)
+        return load(file_path)
+
+    monkeypatch.setattr(mcp_server, "load_canvas_from_file", counting_load)
+    return calls
+
+
+def cached_canvas(path):
+    entry = mcp_server._CANVAS_CACHE.get(str(path))
+    return entry[2] if entry is not None else None
+
+
+def read_nodes(path):
+    return json.loads(path.read_text(encoding="utf-8"))["nodes"]
+
+
+def test_consecutive_edits_reuse_the_canvas(canvas_file, call_tool, loads):
+    canvas = cached_canvas(canvas_file)
+
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("b")})
+    call_tool("add_edge", {"filename": canvas_file.name,
+                           "from_node": "a", "to_node": "b"})
+
+    assert loads == []
+    assert cached_canvas(canvas_file) is canvas
+    assert [n["id"] for n in read_nodes(canvas_file)] == ["a", "l", "b"]
+
+
+def test_external_change_is_reloaded(canvas_file, call_tool, loads):
+    canvas_file.write_text(json.dumps({"nodes": [text_node("z")]}), encoding="utf-8")
+    # Make sure the stat differs even on coarse mtime filesystems
+    os.utime(canvas_file, ns=(0, 0))
+
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("b")})
+
+    assert loads == [canvas_file]
+    assert [n["id"] for n in read_nodes(canvas_file)] == ["z", "b"]
+
+
+@pytest.mark.parametrize("tool, arguments", [
+    ("add_node", {"node": text_node("a")}),
+    ("add_edge", {"from_node": "a", "to_node": "missing"}),
+    ("batch_apply", {"ops": [{"op": "add_edge", "from_node": "a", "to_node": "x"}]}),
+    ("create_mindmap", {"root_node_id": "missing", "children": [{"title": "t"}]}),
+    ("update_node", {"node_id": "missing", "updates": {"x": 1}}),
+    ("update_edge", {"edge_id": "missing", "updates": {"label": "L"}}),
+    ("resolve_td", {"node_id": "l", "resolved_content": "done"}),
+])
+def test_failed_call_keeps_the_unmodified_canvas(canvas_file, call_tool, loads,
+                                                 tool, arguments):
+    canvas = cached_canvas(canvas_file)
+    before = canvas_file.read_bytes()
+
+    text = call_tool(tool, {"filename": canvas_file.name, **arguments})
+
+    assert text.startswith("Error")
+    assert canvas_file.read_bytes() == before
+    assert cached_canvas(canvas_file) is canvas
+    assert mcp_server._CHECKED_OUT_PAYLOADS == {}
+
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("b")})
+    assert loads == []
+
+
+def test_failed_update_drops_the_half_modified_canvas(canvas_file, call_tool):
+    # x is applied before "text" is rejected for the link node
+    text = call_tool("update_node", {
+        "filename": canvas_file.name,
+        "node_id": "l",
+        "updates": {"x": 99, "text": "not a link"},
+    })
+
+    assert "is not a text node" in text
+    assert cached_canvas(canvas_file) is None
+    assert mcp_server._CHECKED_OUT_PAYLOADS == {}
+
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("b")})
+    assert [n["x"] for n in read_nodes(canvas_file)] == [0, 0, 0]
+
+
+def test_exception_mid_edit_leaves_no_checkout_behind(canvas_file, call_tool):
+    text = call_tool("update_node", {
+        "filename": canvas_file.name,
+        "node_id": "a",
+        "updates": {"x": 99, "color": "not a color"},
+    })
+
+    assert text.startswith("Error updating node")
+    assert cached_canvas(canvas_file) is None
+    assert mcp_server._CHECKED_OUT_PAYLOADS == {}
+    assert [n["x"] for n in read_nodes(canvas_file)] == [0, 0]
@@ -0,0 +1,85 @@
+"""Tests for the find_nodes tool and its cached search index."""
+
+import json
+
+import pytest
+
+import mcp_server
+
+
+def node(node_id, node_type, **fields):
+    return {"id": node_id, "type": node_type,
+            "x": 0, "y": 0, "width": 1, "height": 1, **fields}
+
+
+@pytest.fixture
+def canvas_file(output_dir):
+    path = output_dir / "find.canvas"
+    path.write_text(json.dumps({
+        "nodes": [
+            node("t", "text", text="Explain #TD here"),
+            node("g", "group", label="Group #td"),
+            node("f", "file", file="paper.pdf"),
+            node("o", "text", text="other"),
+        ],
+        "edges": [
+            {"id": "e1", "fromNode": "t", "toNode": "f", "label": "source"},
+            {"id": "e2", "fromNode": "o", "toNode": "t"},
+            {"id": "e3", "fromNode": "t", "toNode": "t"},
+        ],
+    }), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def index_builds(monkeypatch):
+    """Count the search indexes built from a Canvas."""
+    calls = []
+    build = mcp_server._index_canvas_search
+
+    def counting_build(canvas):
+        calls.append(canvas)
+        return build(canvas)
+
+    monkeypatch.setattr(mcp_server, "_index_canvas_search", counting_build)
+    return calls
+
+
+def find(call_tool, path, search_text):
+    return call_tool("find_nodes", {"filename": path.name, "search_text": search_text})
+
+
+def test_matches_text_and_group_labels_case_insensitively(canvas_file, call_tool):
+    text = find(call_tool, canvas_file, "#td")
+
+    assert text.startswith("Found 2 node(s) containing '#td'")
+    assert "Node ID: t\nType: text\n" in text
+    assert "Node ID: g\nType: group\n" in text
+
+
+def test_reports_connections_once_each(canvas_file, call_tool):
+    text = find(call_tool, canvas_file, "explain")
+
+    assert "→ [source] Node ID: f\n   Type: file\n   File: paper.pdf\n" in text
+    assert "← Node ID: o\n   Type: text\n   Text: other\n" in text
+    # The self-loop is listed once, as outgoing
+    assert text.count("Node ID: t\n") == 2
+    assert text.count('>>> READ PDF: read_file "paper.pdf"\n') == 1
+
+
+def test_no_match(canvas_file, call_tool):
+    assert find(call_tool, canvas_file, "absent") == (
+        f"No nodes containing 'absent' found in {canvas_file.name}")
+
+
+def test_index_is_reused_until_the_file_changes(canvas_file, call_tool, index_builds):
+    find(call_tool, canvas_file, "#td")
+    find(call_tool, canvas_file, "other")
+    assert len(index_builds) == 1
+
+    call_tool("update_node", {"filename": canvas_file.name, "node_id": "o",
+                              "updates": {"text": "changed #td"}})
+    text = find(call_tool, canvas_file, "#td")
+
+    assert len(index_builds) == 2
+    assert text.startswith("Found 3 node(s)")
@@ -0,0 +1,77 @@
+"""Tests for the stat-keyed caches of parsed canvas files."""
+
+import json
+import os
+
+import pytest
+
+import mcp_server
+
+
+def text_node(node_id, text):
+    return {"id": node_id, "type": "text", "text": text,
+            "x": 0, "y": 0, "width": 1, "height": 1}
+
+
+def write_canvas(path, text):
+    path.write_text(json.dumps({"nodes": [text_node("a", text)]}), encoding="utf-8")
+
+
+@pytest.fixture
+def canvas_file(output_dir):
+    path = output_dir / "read.canvas"
+    write_canvas(path, "one")
+    return path
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Count the JSON parses of canvas files."""
+    calls = []
+    loads = mcp_server._loads
+
+    def counting_loads(data):
+        calls.append(1)
+        return loads(data)
+
+    monkeypatch.setattr(mcp_server, "_loads", counting_loads)
+    return calls
+
+
+def get_text(call_tool, path):
+    node = call_tool("get_node", {"filename": path.name, "node_id": "a"})
+    return json.loads(node)["text"]
+
+
+def test_unchanged_file_is_parsed_once(canvas_file, call_tool, parses):
+    assert get_text(call_tool, canvas_file) == "one"
+    assert get_text(call_tool, canvas_file) == "one"
+    call_tool("find_nodes", {"filename": canvas_file.name, "search_text": "one"})
+
+    assert len(parses) == 1
+
+
+def test_external_change_is_parsed_again(canvas_file, call_tool, parses):
+    assert get_text(call_tool, canvas_file) == "one"
+
+    write_canvas(canvas_file, "three")
+
+    assert get_text(call_tool, canvas_file) == "three"
+    assert len(parses) == 2
+
+
+def test_write_clears_cache_even_if_the_stat_is_unchanged(canvas_file, call_tool):
+    def update_text(text):
+        call_tool("update_node", {"filename": canvas_file.name, "node_id": "a",
+                                  "updates": {"text": text}})
+
+    update_text("abc")
+    st = canvas_file.stat()
+    assert get_text(call_tool, canvas_file) == "abc"
+
+    update_text("xyz")
+    # A same-size rewrite within one mtime tick has the same cache key
+    os.utime(canvas_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert canvas_file.stat().st_size == st.st_size
+
+    assert get_text(call_tool, canvas_file) == "xyz"
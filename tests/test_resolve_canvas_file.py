@@ -0,0 +1,93 @@
+"""Tests for finding canvas files in OUTPUT_PATH by name."""
+
+import json
+
+import mcp_server
+
+
+def text_node(node_id):
+    return {"id": node_id, "type": "text", "text": node_id,
+            "x": 0, "y": 0, "width": 1, "height": 1}
+
+
+def write_canvas(path, node_id="a"):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"nodes": [text_node(node_id)]}), encoding="utf-8")
+    return path
+
+
+def test_exact_name(output_dir):
+    path = write_canvas(output_dir / "plain.canvas")
+
+    assert mcp_server.resolve_canvas_file("plain.canvas") == path
+
+
+def test_name_without_date_prefix(output_dir):
+    path = write_canvas(output_dir / "2024-01-01-idea.canvas")
+
+    assert mcp_server.resolve_canvas_file("idea.canvas") == path
+
+
+def test_glob_characters_are_literal(output_dir):
+    path = write_canvas(output_dir / "2024-01-01-[draft] v?.canvas")
+    write_canvas(output_dir / "2024-01-01-d v1.canvas")
+
+    assert mcp_server.resolve_canvas_file("[draft] v?.canvas") == path
+
+
+def test_missing_file(output_dir):
+    write_canvas(output_dir / "2024-01-01-idea.canvas")
+
+    assert mcp_server.resolve_canvas_file("other.canvas") is None
+
+
+def test_nested_name_without_date_prefix(output_dir):
+    write_canvas(output_dir / "2024-01-01-sub" / "other.canvas")
+    path = write_canvas(output_dir / "2024-01-02-sub" / "x.canvas")
+
+    assert mcp_server.resolve_canvas_file("sub/x.canvas") == path
+    assert mcp_server.resolve_canvas_file("sub/missing.canvas") is None
+
+
+def test_nested_canvas_can_be_edited(output_dir, call_tool):
+    created = call_tool("create_canvas", {
+        "filename": "sub/x",
+        "nodes": [{"id": "a", "type": "text", "text": "a"}],
+    })
+    assert created.startswith("Canvas saved to")
+
+    added = call_tool("add_node", {"filename": "sub/x.canvas", "node": text_node("b")})
+    assert "not found" not in added
+
+    found = call_tool("get_node", {"filename": "sub/x.canvas", "node_id": "b"})
+    assert json.loads(found)["id"] == "b"
+
+
+def test_renamed_file_is_found_again(output_dir):
+    old = write_canvas(output_dir / "2024-01-01-idea.canvas")
+    assert mcp_server.resolve_canvas_file("idea.canvas") == old
+
+    new = old.rename(output_dir / "2024-02-01-idea.canvas")
+
+    assert mcp_server.resolve_canvas_file("idea.canvas") == new
+
+
+def test_suffix_match_is_remembered(output_dir, monkeypatch):
+    path = write_canvas(output_dir / "2024-01-01-idea.canvas")
+    scans = []
+    scandir = mcp_server.os.scandir
+
+    def counting_scandir(*args):
+        scans.append(args)
+        return scandir(*args)
+
+    monkeypatch.setattr(mcp_server.os, "scandir", counting_scandir)
+
+    assert mcp_server.resolve_canvas_file("idea.canvas") == path
+    assert mcp_server.resolve_canvas_file("idea.canvas") == path
+    assert len(scans) == 1
+
+    path.unlink()
+
+    assert mcp_server.resolve_canvas_file("idea.canvas") is None
+    assert "idea.canvas" not in mcp_server._FILE_INDEX
@@ -0,0 +1,137 @@
+"""Tests for the resolve_td tool."""
+
+import json
+
+import pytest
+
+import mcp_server
+
+
+def node(node_id, node_type, **fields):
+    return {"id": node_id, "type": node_type,
+            "x": 0, "y": 0, "width": 1, "height": 1, **fields}
+
+
+@pytest.fixture
+def canvas_file(output_dir):
+    path = output_dir / "td.canvas"
+    path.write_text(json.dumps({"nodes": [
+        node("t", "text", text="#td summarize"),
+        node("f", "file", file="paper.pdf"),
+        node("l", "link", url="https://example.com"),
+        node("g", "group", label="#td group"),
+    ]}), encoding="utf-8")
+    return path
+
+
+def read_nodes(path):
+    return {n["id"]: n for n in json.loads(path.read_text(encoding="utf-8"))["nodes"]}
+
+
+def test_text_node_is_resolved(canvas_file, call_tool):
+    text = call_tool("resolve_td", {
+        "filename": canvas_file.name, "node_id": "t", "resolved_content": "Summary",
+    })
+
+    assert text.startswith("Successfully resolved #td in node 't'")
+    resolved = read_nodes(canvas_file)["t"]
+    assert resolved["text"] == "Summary"
+    assert (resolved["width"], resolved["height"]) == (300, 150)
+
+
+@pytest.mark.parametrize("node_id", ["f", "l", "g"])
+def test_other_node_types_are_rejected(canvas_file, call_tool, node_id):
+    before = canvas_file.read_bytes()
+
+    text = call_tool("resolve_td", {
+        "filename": canvas_file.name, "node_id": node_id, "resolved_content": "x",
+    })
+
+    assert text == f"Error: Node '{node_id}' is not a text node"
+    assert canvas_file.read_bytes() == before
+
+
+def test_uncached_canvas_is_resolved_without_a_canvas(canvas_file, call_tool,
+                                                      monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("built a Canvas")
+
+    monkeypatch.setattr(mcp_server.Canvas, "from_dict", fail)
+
+    text = call_tool("resolve_td", {
+        "filename": canvas_file.name, "node_id": "t", "resolved_content": "Summary",
+    })
+
+    assert text.startswith("Successfully resolved")
+    assert read_nodes(canvas_file)["t"]["text"] == "Summary"
+
+
+def test_cached_canvas_is_resolved_in_place(canvas_file, call_tool):
+    call_tool("add_node", {"filename": canvas_file.name,
+                           "node": node("n", "text", text="")})
+    canvas = mcp_server._CANVAS_CACHE[str(canvas_file)][2]
+
+    call_tool("resolve_td", {
+        "filename": canvas_file.name, "node_id": "t", "resolved_content": "Summary",
+    })
+
+    assert mcp_server._CANVAS_CACHE[str(canvas_file)][2] is canvas
+    assert canvas.get_node("t").text == "Summary"
+    assert read_nodes(canvas_file)["t"]["text"] == "Summary"
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_checkout_element(canvas_file, call_tool, cached):
+    if cached:
+        call_tool("add_node", {"filename": canvas_file.name,
+                               "node": node("n", "text", text="")})
+    before = canvas_file.read_bytes()
+
+    element, has_node, commit, release = mcp_server._checkout_element(
+        canvas_file, "nodes", "t")
+    assert element.text == "#td summarize"
+    assert has_node("g") and not has_node("missing")
+    release()
+    assert canvas_file.read_bytes() == before
+
+    element, _, commit, _ = mcp_server._checkout_element(canvas_file, "nodes", "t")
+    element.text = "done"
+    commit()
+    assert read_nodes(canvas_file)["t"]["text"] == "done"
+
+    missing, _, _, release = mcp_server._checkout_element(canvas_file, "edges", "t")
+    assert missing is None
+    release()
+    assert mcp_server._CHECKED_OUT_PAYLOADS == {}
+
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_resubmitted_content_is_not_saved_again(canvas_file, call_tool, monkeypatch,
+                                                cached):
+    arguments = {"filename": canvas_file.name, "node_id": "t",
+                 "resolved_content": "Summary"}
+    call_tool("resolve_td", arguments)
+    if not cached:
+        mcp_server._CANVAS_CACHE.clear()
+    writes = []
+    monkeypatch.setattr(mcp_server, "_write_atomic",
+                        lambda file_path, payload: writes.append(file_path))
+
+    text = call_tool("resolve_td", arguments)
+
+    assert text.startswith("Node 't' already has this content; nothing to save.")
+    assert writes == []
+    assert mcp_server._CHECKED_OUT_PAYLOADS == {}
+
+
+def test_same_content_with_another_size_is_saved(canvas_file, call_tool):
+    call_tool("update_node", {"filename": canvas_file.name, "node_id": "t",
+                              "updates": {"text": "Summary"}})
+
+    text = call_tool("resolve_td", {
+        "filename": canvas_file.name, "node_id": "t", "resolved_content": "Summary",
+    })
+
+    assert text.startswith("Successfully resolved")
+    resolved = read_nodes(canvas_file)["t"]
+    assert (resolved["width"], resolved["height"]) == (300, 150)
@@ -0,0 +1,44 @@
+"""Tests for saving edits of cached canvases by re-serializing only changed elements."""
+
+import json
+
+import mcp_server
+
+
+def text_node(node_id, x=0):
+    return {"id": node_id, "type": "text", "text": node_id,
+            "x": x, "y": 0, "width": 1, "height": 1}
+
+
+def read_canvas(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def full_serialization(path):
+    """The dict a from-scratch save of the file's canvas would write."""
+    return mcp_server.Canvas.from_dict(read_canvas(path)).to_dict()
+
+
+def test_updates_after_adds_patch_the_right_elements(output_dir, call_tool):
+    call_tool("create_canvas", {
+        "filename": "patch",
+        "nodes": [text_node(f"n{i}") for i in range(5)],
+        "edges": [{"id": "e0", "fromNode": "n0", "toNode": "n1"}],
+    })
+    path = next(output_dir.iterdir())
+    name = path.name
+
+    # The first update builds the ID-to-position map for nodes; the add after
+    # it must extend the map, and the last update must find the added node
+    call_tool("update_node", {"filename": name, "node_id": "n3", "updates": {"x": 30}})
+    call_tool("add_node", {"filename": name, "node": text_node("n5")})
+    call_tool("add_edge", {"filename": name, "from_node": "n4", "to_node": "n5"})
+    call_tool("update_node", {"filename": name, "node_id": "n5", "updates": {"x": 50}})
+    call_tool("update_edge", {"filename": name, "edge_id": "e0",
+                              "updates": {"label": "L"}})
+
+    data = read_canvas(path)
+    assert [n["x"] for n in data["nodes"]] == [0, 0, 0, 30, 0, 50]
+    assert data["edges"][0]["label"] == "L"
+    assert len(data["edges"]) == 2
+    assert data == full_serialization(path)
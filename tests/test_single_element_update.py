@@ -0,0 +1,74 @@
+"""Tests for updating one node or edge without building the whole Canvas."""
+
+import json
+
+import pytest
+
+import mcp_server
+
+
+def text_node(node_id, **fields):
+    return {"id": node_id, "type": "text", "text": node_id,
+            "x": 0, "y": 0, "width": 1, "height": 1, **fields}
+
+
+@pytest.fixture
+def canvas_file(output_dir):
+    """A canvas that is not in the edit cache, with a field no tool writes."""
+    path = output_dir / "raw.canvas"
+    path.write_text(json.dumps({
+        "nodes": [text_node("a", custom="kept"), text_node("b")],
+        "edges": [{"id": "e", "fromNode": "a", "toNode": "b", "custom": "kept"}],
+    }), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def no_canvas(monkeypatch):
+    """Fail if a whole Canvas is built."""
+    def fail(*args, **kwargs):
+        raise AssertionError("built a Canvas")
+
+    monkeypatch.setattr(mcp_server.Canvas, "from_dict", fail)
+
+
+def read_canvas(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_update_node_edits_only_that_node(canvas_file, call_tool, no_canvas):
+    text = call_tool("update_node", {"filename": canvas_file.name, "node_id": "b",
+                                     "updates": {"x": 5, "text": "B"}})
+
+    assert text.startswith("Successfully updated node 'b'")
+    data = read_canvas(canvas_file)
+    assert data["nodes"][0]["custom"] == "kept"
+    assert data["edges"][0]["custom"] == "kept"
+    assert (data["nodes"][1]["x"], data["nodes"][1]["text"]) == (5, "B")
+
+
+def test_update_edge_checks_nodes_in_the_file(canvas_file, call_tool, no_canvas):
+    before = canvas_file.read_bytes()
+
+    text = call_tool("update_edge", {"filename": canvas_file.name, "edge_id": "e",
+                                     "updates": {"to_node": "missing"}})
+
+    assert text == "Error: Node 'missing' not found"
+    assert canvas_file.read_bytes() == before
+
+    text = call_tool("update_edge", {"filename": canvas_file.name, "edge_id": "e",
+                                     "updates": {"to_node": "a", "label": "L"}})
+
+    assert text.startswith("Successfully updated edge 'e'")
+    edge = read_canvas(canvas_file)["edges"][0]
+    assert (edge["toNode"], edge["label"]) == ("a", "L")
+
+
+def test_edits_after_a_raw_save_build_on_it(canvas_file, call_tool):
+    call_tool("update_node", {"filename": canvas_file.name, "node_id": "a",
+                              "updates": {"x": 7}})
+    call_tool("add_node", {"filename": canvas_file.name, "node": text_node("c")})
+    call_tool("update_node", {"filename": canvas_file.name, "node_id": "c",
+                              "updates": {"x": 9}})
+
+    assert [n["x"] for n in read_canvas(canvas_file)["nodes"]] == [7, 0, 9]
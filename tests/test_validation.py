@@ -0,0 +1,34 @@
+"""Tests for jsoncanvas node and edge field validation."""
+
+import pytest
+
+from jsoncanvas import Edge, GroupNode, InvalidEdgeError, InvalidNodeError, TextNode
+
+
+@pytest.mark.parametrize(
+    "field", ["from_side", "to_side", "from_end", "to_end", "color"]
+)
+@pytest.mark.parametrize("value", [["top"], {"side": "top"}, 3, "diagonal"])
+def test_edge_rejects_invalid_enumerated_values(field, value):
+    with pytest.raises(InvalidEdgeError):
+        Edge(id="e", from_node="a", to_node="b", **{field: value})
+
+
+def test_edge_accepts_valid_enumerated_values():
+    edge = Edge(id="e", from_node="a", to_node="b", from_side="top", to_side="left",
+                from_end="none", to_end="arrow", color="3")
+
+    assert (edge.from_side, edge.to_side, edge.from_end, edge.to_end, edge.color) == (
+        "top", "left", "none", "arrow", "3")
+
+
+@pytest.mark.parametrize("value", [["1"], {"color": "1"}, 1, "7"])
+def test_node_rejects_invalid_colors(value):
+    with pytest.raises(InvalidNodeError):
+        TextNode(id="n", x=0, y=0, width=1, height=1, text="", color=value)
+
+
+@pytest.mark.parametrize("value", [["cover"], {"style": "cover"}, "stretch"])
+def test_group_rejects_invalid_background_styles(value):
+    with pytest.raises(InvalidNodeError):
+        GroupNode(id="g", x=0, y=0, width=1, height=1, background_style=value)
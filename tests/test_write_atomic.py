@@ -0,0 +1,68 @@
+"""Tests for atomic canvas file writes."""
+
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+import mcp_server
+
+posix_only = pytest.mark.skipif(sys.platform == "win32",
+                                reason="POSIX symlinks and modes")
+
+
+def test_replaces_content_without_leftovers(tmp_path):
+    path = tmp_path / "a.canvas"
+    path.write_bytes(b"old")
+
+    mcp_server._write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.canvas"]
+
+
+def test_failed_swap_keeps_the_original(tmp_path, monkeypatch):
+    path = tmp_path / "a.canvas"
+    path.write_bytes(b"old")
+
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(mcp_server.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        mcp_server._write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["a.canvas"]
+
+
+@posix_only
+def test_keeps_the_file_mode(tmp_path):
+    path = tmp_path / "a.canvas"
+    path.write_bytes(b"old")
+    path.chmod(0o600)
+
+    mcp_server._write_atomic(path, b"new")
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+
+
+@posix_only
+def test_symlinked_canvas_is_written_through(output_dir, tmp_path_factory, call_tool):
+    vault = tmp_path_factory.mktemp("vault")
+    real = vault / "real.canvas"
+    node = {"id": "a", "type": "text", "text": "a",
+            "x": 0, "y": 0, "width": 1, "height": 1}
+    real.write_text(json.dumps({"nodes": [node]}), encoding="utf-8")
+    link = output_dir / "link.canvas"
+    link.symlink_to(real)
+
+    call_tool("update_node", {"filename": link.name, "node_id": "a",
+                              "updates": {"text": "b"}})
+
+    assert link.is_symlink()
+    assert os.readlink(link) == str(real)
+    assert json.loads(real.read_text(encoding="utf-8"))["nodes"][0]["text"] == "b"
+    assert sorted(p.name for p in vault.iterdir()) == ["real.canvas"]
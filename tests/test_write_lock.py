@@ -0,0 +1,54 @@
+"""Tests that writing tools run one at a time."""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import mcp_server
+
+
+def text_node(node_id):
+    return {"id": node_id, "type": "text", "text": node_id,
+            "x": 0, "y": 0, "width": 1, "height": 1}
+
+
+def test_cancelled_write_still_blocks_the_next_one(output_dir, monkeypatch):
+    path = output_dir / "lock.canvas"
+    path.write_text(json.dumps({"nodes": [text_node("a")]}), encoding="utf-8")
+
+    # Hold the first save until the second call has had a chance to run
+    entered = threading.Event()
+    release = threading.Event()
+    write_atomic = mcp_server._write_atomic
+
+    def slow_first_write(file_path, payload):
+        if not entered.is_set():
+            entered.set()
+            release.wait(timeout=5)
+        write_atomic(file_path, payload)
+
+    monkeypatch.setattr(mcp_server, "_write_atomic", slow_first_write)
+
+    async def add_node(node_id):
+        return await mcp_server.handle_call_tool(
+            "add_node", {"filename": path.name, "node": text_node(node_id)}
+        )
+
+    async def scenario():
+        first = asyncio.create_task(add_node("b"))
+        await asyncio.to_thread(entered.wait, 5)
+        # A cancelled request stops awaiting, but its handler keeps running
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        second = asyncio.create_task(add_node("c"))
+        await asyncio.sleep(0.2)
+        release.set()
+        await second
+
+    asyncio.run(scenario())
+
+    node_ids = [n["id"] for n in json.loads(path.read_text(encoding="utf-8"))["nodes"]]
+    assert node_ids == ["a", "b", "c"]